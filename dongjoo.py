@@ -3,28 +3,338 @@ import yfinance as yf
 import pandas as pd
 import plotly.graph_objects as go
 import numpy as np
+import bisect
+import csv
+import functools
+import os
+import pickle
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from datetime import datetime
 
 # 0. yfinance 캐시용 헬퍼 함수들 --------------------
-@st.cache_data(ttl=3600)
-def get_exchange_rates_cached():
+# 워커 간 공용 캐시 (선택):
+# st.cache_data 는 프로세스마다 따로라서, 워커를 여러 개 띄우면 워커마다 같은 데이터를 다시 받음.
+# DONGJOO_SHARED_CACHE 를 설정하면 같은 서버의 모든 워커가 한 번 받은 데이터를 같이 씀.
+#   sqlite:///var/tmp/dongjoo-cache.sqlite  → 파일 하나를 공유 (WAL + 메모리 매핑 읽기)
+#   redis://localhost:6379/0                → redis 패키지 필요
+# 설정이 없으면 기존처럼 프로세스별 st.cache_data 를 사용
+# 저장 형식은 pickle 이라 읽을 때 임의 코드가 실행될 수 있음 → 이 앱의 워커만 쓸 수 있는 저장소를 지정할 것
+# (SQLite 파일은 앱 계정만 쓰기 가능한 경로에, Redis 는 인증된 전용 인스턴스/DB 로)
+SHARED_CACHE_URL = os.environ.get("DONGJOO_SHARED_CACHE", "")
+SHARED_CACHE_WAIT = 30  # 초, 다른 워커가 같은 데이터를 받는 중이면 이만큼 기다림
+
+class SQLiteCacheBackend:
+    """같은 호스트의 워커 프로세스들이 공유하는 SQLite 캐시"""
+
+    def __init__(self, path: str):
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=SHARED_CACHE_WAIT, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA mmap_size=268435456")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, value BLOB NOT NULL, expires REAL NOT NULL)"
+        )
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS leases (key TEXT PRIMARY KEY, expires REAL NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get(self, key: str):
+        try:
+            with self.lock:
+                row = self.conn.execute(
+                    "SELECT value FROM cache WHERE key = ? AND expires > ?",
+                    (key, time.time()),
+                ).fetchone()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: int):
+        now = time.time()
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM cache WHERE expires <= ?", (now,))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+                    (key, sqlite3.Binary(value), now + ttl),
+                )
+        except sqlite3.Error:
+            pass
+
+    def acquire(self, key: str, ttl: int) -> bool:
+        """이 키를 받아올 권한(임대)을 얻으면 True. 저장소 오류 시에는 그냥 직접 받도록 True"""
+        now = time.time()
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM leases WHERE key = ? AND expires <= ?", (key, now))
+                cur = self.conn.execute(
+                    "INSERT OR IGNORE INTO leases (key, expires) VALUES (?, ?)",
+                    (key, now + ttl),
+                )
+                return cur.rowcount == 1
+        except sqlite3.Error:
+            return True
+
+    def release(self, key: str):
+        try:
+            with self.lock, self.conn:
+                self.conn.execute("DELETE FROM leases WHERE key = ?", (key,))
+        except sqlite3.Error:
+            pass
+
+class RedisCacheBackend:
+    """여러 서버가 공유하는 Redis 캐시 (SQLiteCacheBackend 와 같은 get/set/acquire/release)
+
+    Redis 장애 시에도 SQLite 백엔드처럼 캐시 없이 직접 받아오도록 오류를 삼킴
+    """
+
+    def __init__(self, url: str):
+        import redis  # 선택 의존성: 이 백엔드를 쓸 때만 필요
+
+        self.client = redis.Redis.from_url(url)
+        self.error = redis.RedisError
+
+    def get(self, key: str):
+        try:
+            return self.client.get(key)
+        except self.error:
+            return None
+
+    def set(self, key: str, value: bytes, ttl: int):
+        try:
+            self.client.set(key, value, ex=ttl)
+        except self.error:
+            pass
+
+    def acquire(self, key: str, ttl: int) -> bool:
+        """이 키를 받아올 권한(임대)을 얻으면 True. 저장소 오류 시에는 그냥 직접 받도록 True"""
+        try:
+            return bool(self.client.set(f"lease:{key}", 1, nx=True, ex=ttl))
+        except self.error:
+            return True
+
+    def release(self, key: str):
+        try:
+            self.client.delete(f"lease:{key}")
+        except self.error:
+            pass
+
+@st.cache_resource
+def get_shared_cache():
+    """DONGJOO_SHARED_CACHE 에 맞는 백엔드 (설정이 없으면 None)"""
+    if not SHARED_CACHE_URL:
+        return None
+    if SHARED_CACHE_URL.startswith("sqlite://"):
+        return SQLiteCacheBackend(SHARED_CACHE_URL[len("sqlite://"):])
+    if SHARED_CACHE_URL.startswith(("redis://", "rediss://", "unix://")):
+        return RedisCacheBackend(SHARED_CACHE_URL)
+    raise ValueError(f"지원하지 않는 DONGJOO_SHARED_CACHE 값: {SHARED_CACHE_URL}")
+
+def shared_cache_call(backend, func, args, ttl):
+    """공용 캐시에서 읽고, 없으면 한 워커만 받아와 저장 (나머지 워커는 저장될 때까지 기다림)"""
+    key = f"dongjoo:{func.__qualname__}:{args!r}"
+    deadline = time.monotonic() + SHARED_CACHE_WAIT
+    while True:
+        blob = backend.get(key)
+        if blob is not None:
+            return pickle.loads(blob)
+        if backend.acquire(key, SHARED_CACHE_WAIT):
+            try:
+                value = func(*args)
+                backend.set(key, pickle.dumps(value), ttl)
+                return value
+            finally:
+                backend.release(key)
+        if time.monotonic() > deadline:
+            return func(*args)  # 다른 워커가 너무 오래 걸리면 직접 받음
+        time.sleep(0.1)
+
+def cached_fetch(ttl: int):
+    """야후 요청용 캐시 데코레이터: 공용 캐시가 설정되어 있으면 워커 간 공유, 아니면 st.cache_data"""
+
+    def decorator(func):
+        backend = get_shared_cache()
+        if backend is None:
+            return st.cache_data(ttl=ttl, show_spinner=False)(func)
+
+        @functools.wraps(func)
+        def wrapper(*args):
+            return shared_cache_call(backend, func, args, ttl)
+
+        return wrapper
+
+    return decorator
+
+# 통화 → (야후 환율 티커, 요청 실패 시 기본값)
+FX_PAIRS = {"CAD": ("USDCAD=X", 1.42), "KRW": ("USDKRW=X", 1410.0)}
+
+# 아래 함수들은 백그라운드 스레드에서 호출되므로 cached_fetch 는 스피너 없이 캐시함 (스레드에는 화면 컨텍스트가 없음)
+@cached_fetch(ttl=3600)
+def load_fx_rate(pair: str, default: float):
+    """USD 대비 환율 하나 (통화쌍마다 따로 요청해서 동시에 받음)"""
     try:
-        usd_cad = yf.Ticker("USDCAD=X")
-        usd_krw = yf.Ticker("USDKRW=X")
-        c_rate = usd_cad.info.get("regularMarketPrice", 1.42)
-        k_rate = usd_krw.info.get("regularMarketPrice", 1410.0)
-        return {"USD": 1.0, "CAD": c_rate, "KRW": k_rate}
+        return yf.Ticker(pair).info.get("regularMarketPrice", default)
     except Exception:
-        return {"USD": 1.0, "CAD": 1.42, "KRW": 1410.0}
-
-@st.cache_data(ttl=3600)
-def load_stock_all(ticker: str):
-    """티커 정보 + 전체/5년 히스토리 캐시"""
+        return default
+
+@cached_fetch(ttl=3600)
+def load_stock_info(ticker: str):
+    """티커 정보(.info) 캐시 + 오늘자 펀더멘털 스냅샷 저장"""
+    info = yf.Ticker(ticker).info
+    save_fundamentals_snapshot(ticker, info)
+    return info
+
+@cached_fetch(ttl=3600)
+def load_stock_history(ticker: str, period: str):
+    """티커 히스토리 + 거래 통화 캐시 (통화는 히스토리 메타데이터에서 읽어 .info 를 기다리지 않음)"""
     stock = yf.Ticker(ticker)
-    info = stock.info
-    hist_full = stock.history(period="max")
-    hist_5y = stock.history(period="5y")
-    return info, hist_full, hist_5y
+    hist = stock.history(period=period)
+    currency = (stock.history_metadata or {}).get("currency")
+    return hist, currency
+
+# 풀은 프로세스의 모든 세션이 같이 씀: 동시에 새 티커를 여는 세션 수 × 세션당 요청 수(info, 히스토리 2개, 환율 2개)
+# 만큼 스레드를 둬야 다른 사용자의 요청 뒤에 줄 서지 않음 (스레드는 대부분 네트워크 대기라 가벼움)
+FETCH_SESSIONS = int(os.environ.get("DONGJOO_FETCH_SESSIONS", "16"))
+FETCH_REQUESTS_PER_SESSION = 3 + len(FX_PAIRS)
+
+@st.cache_resource
+def get_fetch_pool():
+    """네트워크 요청을 동시에 보내기 위한 공용 스레드 풀"""
+    return ThreadPoolExecutor(
+        max_workers=FETCH_SESSIONS * FETCH_REQUESTS_PER_SESSION,
+        thread_name_prefix="yf-fetch",
+    )
+
+def start_fx_fetch():
+    """통화쌍별 환율 요청을 동시에 시작하고 future 를 돌려줌"""
+    pool = get_fetch_pool()
+    return {
+        currency: pool.submit(load_fx_rate, pair, default)
+        for currency, (pair, default) in FX_PAIRS.items()
+    }
+
+def start_stock_fetch(ticker: str):
+    """info / 전체 히스토리 / 5년 히스토리 요청을 동시에 시작하고 future 를 돌려줌"""
+    pool = get_fetch_pool()
+    return {
+        "info": pool.submit(load_stock_info, ticker),
+        "hist_full": pool.submit(load_stock_history, ticker, "max"),
+        "hist_5y": pool.submit(load_stock_history, ticker, "5y"),
+    }
+
+# 펀더멘털 스냅샷 저장소 (SQLite) --------------------
+# Graham/DCF 입력값을 티커·일자별로 저장해 두고, 야후가 느리거나 막혔을 때 디스크에서 읽음
+SNAPSHOT_DB_PATH = os.environ.get(
+    "DONGJOO_SNAPSHOT_DB",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "fundamentals.sqlite"),
+)
+SNAPSHOT_NUM_FIELDS = (
+    "forwardEps",
+    "trailingEps",
+    "operatingCashflow",
+    "sharesOutstanding",
+    "earningsGrowth",
+    "revenueGrowth",
+    "earningsQuarterlyGrowth",
+    "currentPrice",
+    "forwardPE",
+    "trailingPE",
+    "returnOnEquity",
+    "priceToBook",
+    "fiftyTwoWeekHigh",
+    "fiftyTwoWeekLow",
+)
+SNAPSHOT_TEXT_FIELDS = ("currency", "quoteType", "longName", "shortName", "sector", "industry")
+SNAPSHOT_FIELDS = SNAPSHOT_NUM_FIELDS + SNAPSHOT_TEXT_FIELDS
+SNAPSHOT_QUERY_CHUNK = 500  # SQLite 바인딩 변수 개수 제한 대비
+
+@st.cache_resource
+def get_snapshot_db():
+    """프로세스 공용 SQLite 연결 (스레드 간 공유하므로 잠금으로 직렬화)"""
+    conn = sqlite3.connect(SNAPSHOT_DB_PATH, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    columns = ", ".join(
+        [f"{f} REAL" for f in SNAPSHOT_NUM_FIELDS]
+        + [f"{f} TEXT" for f in SNAPSHOT_TEXT_FIELDS]
+    )
+    # (ticker, snap_date) 기본키 = 티커별 조회/최신일 조회용 인덱스
+    conn.execute(
+        f"CREATE TABLE IF NOT EXISTS fundamentals ("
+        f"ticker TEXT NOT NULL, snap_date TEXT NOT NULL, {columns}, "
+        f"PRIMARY KEY (ticker, snap_date)) WITHOUT ROWID"
+    )
+    conn.commit()
+    return conn, threading.Lock()
+
+def save_fundamentals_snapshot(ticker: str, info: dict):
+    """오늘자 스냅샷 저장 (같은 날 다시 받으면 덮어씀). 저장 실패는 앱 동작에 영향 없음"""
+    if not info or all(info.get(f) is None for f in SNAPSHOT_NUM_FIELDS):
+        return
+    row = [ticker, datetime.now().strftime("%Y-%m-%d")]
+    for f in SNAPSHOT_NUM_FIELDS:
+        v = info.get(f)
+        row.append(float(v) if isinstance(v, (int, float)) else None)
+    row += [info.get(f) for f in SNAPSHOT_TEXT_FIELDS]
+    try:
+        conn, lock = get_snapshot_db()
+        with lock:
+            conn.execute(
+                f"INSERT OR REPLACE INTO fundamentals (ticker, snap_date, {', '.join(SNAPSHOT_FIELDS)}) "
+                f"VALUES ({', '.join('?' * len(row))})",
+                row,
+            )
+            conn.commit()
+    except sqlite3.Error:
+        pass
+
+def load_latest_fundamentals_many(tickers):
+    """여러 티커의 최신 스냅샷을 한 번에 조회 → {ticker: dict}"""
+    tickers = list(dict.fromkeys(tickers))
+    result = {}
+    try:
+        conn, lock = get_snapshot_db()
+        with lock:
+            for i in range(0, len(tickers), SNAPSHOT_QUERY_CHUNK):
+                chunk = tickers[i : i + SNAPSHOT_QUERY_CHUNK]
+                marks = ", ".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT f.* FROM fundamentals f JOIN ("
+                    f"SELECT ticker, MAX(snap_date) AS snap_date FROM fundamentals "
+                    f"WHERE ticker IN ({marks}) GROUP BY ticker"
+                    f") latest USING (ticker, snap_date)",
+                    chunk,
+                ).fetchall()
+                for r in rows:
+                    result[r["ticker"]] = dict(r)
+    except sqlite3.Error:
+        pass
+    return result
+
+def load_latest_fundamentals(ticker: str):
+    """티커의 가장 최근 스냅샷 (없으면 None)"""
+    return load_latest_fundamentals_many([ticker]).get(ticker)
+
+def load_fundamentals_history(ticker: str):
+    """티커의 일자별 스냅샷 전체 (snap_date 인덱스 DataFrame)"""
+    try:
+        conn, lock = get_snapshot_db()
+        with lock:
+            rows = conn.execute(
+                "SELECT * FROM fundamentals WHERE ticker = ? ORDER BY snap_date",
+                (ticker,),
+            ).fetchall()
+    except sqlite3.Error:
+        rows = []
+    df = pd.DataFrame([dict(r) for r in rows], columns=["ticker", "snap_date", *SNAPSHOT_FIELDS])
+    df[list(SNAPSHOT_NUM_FIELDS)] = df[list(SNAPSHOT_NUM_FIELDS)].astype(float)  # 빈 값(None) → NaN
+    df.index = pd.to_datetime(df.pop("snap_date"))
+    return df
 
 # 레버리지 감지 + 경고 --------------------
 def detect_leveraged_from_info(info: dict) -> bool:
@@ -61,6 +371,118 @@ def leveraged_warning_text(lang: str = "KO") -> str:
             "Always read the ETF prospectus and risk disclosures before investing.[web:393][web:399]\n"
         )
 
+# 티커 검색 인덱스 --------------------
+# 로컬 종목 목록(symbols.csv)의 심볼/영문·한글 이름을 접두사로 검색하고, 잘못된 입력은 야후 요청 전에 거름
+SYMBOLS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "symbols.csv")
+# 야후 티커 형식: AAPL, BRK-B, BTC-USD, 005930.KS, SHOP.TO, USDKRW=X, GC=F, ^GSPC
+TICKER_PATTERN = re.compile(
+    r"[A-Z]{1,5}(-[A-Z]{1,3})?"
+    r"|[A-Z0-9][A-Z0-9-]{0,9}\.[A-Z]{1,3}"
+    r"|[A-Z0-9]{1,10}=[XF]"
+    r"|\^[A-Z0-9.]{1,10}"
+)
+KRX_CODE_PATTERN = re.compile(r"[0-9][0-9A-Z]{5}")
+KRX_TICKER_PATTERN = re.compile(r"[0-9][0-9A-Z]{5}\.(KS|KQ)")
+
+def _search_key(text: str) -> str:
+    return "".join(text.casefold().split())
+
+@st.cache_resource
+def get_symbol_index():
+    """검색 키를 정렬해 둔 종목 인덱스 (bisect 로 접두사 범위를 바로 찾음)"""
+    with open(SYMBOLS_PATH, encoding="utf-8", newline="") as f:
+        rows = list(csv.DictReader(f))
+
+    pairs = set()
+    for i, row in enumerate(rows):
+        pairs.add((_search_key(row["symbol"]), i))
+        pairs.add((_search_key(row["symbol"].split(".")[0]), i))  # 005930, SHOP
+        for name in (row["name_en"], row["name_ko"]):
+            words = name.split()
+            # "Bank of Montreal" 은 "montreal" 로도, "뱅가드 S&P 500 ETF" 는 "s&p500" 으로도 검색됨
+            for k in range(len(words)):
+                pairs.add((_search_key(" ".join(words[k:])), i))
+    pairs = sorted(pairs)
+    return {
+        "keys": [k for k, _ in pairs],
+        "ids": [i for _, i in pairs],
+        "rows": rows,
+        "by_symbol": {row["symbol"]: row for row in rows},
+    }
+
+def search_symbols(query: str, limit: int = 8):
+    """접두사가 일치하는 종목 (심볼 일치 → 심볼 접두사 → 이름 일치 순)"""
+    q = _search_key(query)
+    if not q:
+        return []
+    index = get_symbol_index()
+    lo = bisect.bisect_left(index["keys"], q)
+    hi = bisect.bisect_left(index["keys"], q + "\U0010ffff")
+
+    ranked = {}
+    for i in index["ids"][lo:hi]:
+        row = index["rows"][i]
+        symbol_key = _search_key(row["symbol"])
+        if q in (symbol_key, _search_key(row["symbol"].split(".")[0])):
+            rank = 0
+        elif symbol_key.startswith(q):
+            rank = 1
+        else:
+            rank = 2
+        ranked[i] = min(rank, ranked.get(i, rank))
+    order = sorted(ranked, key=lambda i: (ranked[i], i))
+    return [index["rows"][i] for i in order[:limit]]
+
+def is_valid_ticker_format(symbol: str) -> bool:
+    if KRX_CODE_PATTERN.fullmatch(symbol):
+        return False  # 한국 종목 코드는 .KS / .KQ 가 있어야 함
+    if symbol.endswith((".KS", ".KQ")):
+        return bool(KRX_TICKER_PATTERN.fullmatch(symbol))
+    return bool(TICKER_PATTERN.fullmatch(symbol))
+
+def resolve_ticker(text: str):
+    """입력값 → (티커, 후보 심볼 목록)
+
+    목록에 있는 심볼이나 정확히 일치하는 이름은 바로 티커로, 애매하면 후보를 돌려줌.
+    둘 다 None / [] 이면 형식이 잘못된 입력이라 네트워크 요청 없이 거절.
+    """
+    query = text.strip()
+    if not query:
+        return None, []
+    symbol = query.upper()
+    if symbol in get_symbol_index()["by_symbol"]:
+        return symbol, []
+
+    matches = search_symbols(query)
+    valid = is_valid_ticker_format(symbol)
+    q = _search_key(query)
+    # 이름이 정확히 일치하거나, 그 자체로는 티커가 아닌 입력(005930)이 심볼 앞부분과 일치하면 바로 사용
+    exact = [
+        r
+        for r in matches
+        if q in (_search_key(r["name_en"]), _search_key(r["name_ko"]))
+        or (not valid and q == _search_key(r["symbol"].split(".")[0]))
+    ]
+    if len(exact) == 1:
+        # 대문자로 입력한 티커 형식(KT, BCE)은 다른 상장 종목의 티커일 수 있어 임의로 바꾸지 않고 고르게 함.
+        # Apple, 삼성전자 처럼 이름으로 입력한 경우만 바로 사용
+        if valid and query == symbol and exact[0]["symbol"] != symbol:
+            return None, [exact[0]["symbol"], symbol]
+        return exact[0]["symbol"], []
+
+    if not matches:
+        return (symbol if valid else None), []
+    suggestions = [r["symbol"] for r in matches]
+    if valid and symbol not in suggestions:
+        suggestions.append(symbol)  # 목록에 없는 티커도 직접 고를 수 있게
+    return None, suggestions
+
+def symbol_label(symbol: str, lang: str = "KO") -> str:
+    row = get_symbol_index()["by_symbol"].get(symbol)
+    if row is None:
+        return symbol
+    return f"{symbol} · {row['name_ko'] if lang == 'KO' else row['name_en']}"
+
 # 1. UI 및 다크 테마 설정 ---------------------------------
 st.set_page_config(page_title="Wealthy Dongjoo", layout="centered")
 st.markdown(
@@ -97,9 +519,15 @@ L = {
 - 🇨🇦 캐나다: SHOP.TO, TD.TO
 - 💼 ETF: SPY, QQQ, VFV.TO
         
-**주의:** 주식 이름이 아닌 **티커 심볼**로 입력하세요!
+**팁:** 회사 이름(삼성전자, Apple)이나 종목 코드 앞부분으로도 검색할 수 있어요.
         """,
+        "ticker_suggest": "혹시 이 종목을 찾으세요?",
+        "ticker_pick": "종목 선택",
+        "ticker_invalid": "⚠️ 티커 형식이 올바르지 않습니다. 예: AAPL, 005930.KS, SHOP.TO (한국 종목은 .KS / .KQ 를 붙여 주세요)",
         "company_info": "기업 정보",
+        "loading_info": "⏳ 기업 정보를 불러오는 중...",
+        "snapshot_used": "📦 야후 응답이 없어 {date} 저장 데이터를 표시합니다.",
+        "history_unavailable": "📉 주가 히스토리를 받지 못해 차트, What IF, 자산성장 예측은 생략합니다.",
         "tm_title": "🕰️ What IF",
         "tm_start": "투자 시작 연도",
         "sim_title": "📊 자산성장 예측표",
@@ -137,6 +565,13 @@ L = {
         "dcf_help": "DCF 적정가는 미래 현금흐름을 할인해 계산한 주당 이론적 가치(현금창출력 중심)입니다.",
         "avg_label": "평균 적정가",
         "growth_used": "적용 성장률",
+        "hist_cagr": "과거 CAGR",
+        "bt_title": "📈 적정가 히스토리 백테스트",
+        "bt_price": "주가",
+        "bt_intrinsic": "적정가",
+        "bt_band": "적정가 ±15% 구간",
+        "bt_cols": ["기간 비중", "1년 후 평균 수익률", "1년 후 상승 확률", "표본 수"],
+        "bt_note": "저장된 펀더멘털 스냅샷이 있는 날짜는 그 값을, 그 이전 구간은 현재(또는 가장 오래된) EPS·현금흐름을 적용 성장률로 거꾸로 할인한 추정치를 사용합니다. 추정 구간은 현재 정보로 만든 값이라 참고용으로 차트에만 표시하고, 표의 통계는 스냅샷이 있는 날짜만으로 계산합니다 (스냅샷이 쌓일수록 채워짐).",
         "etf_warning": "ℹ️ ETF는 여러 종목 묶음 상품이라 Graham / DCF 같은 개별 주식 적정가 모델을 그대로 적용하기 어렵습니다. 지수 추종, 보수, 배당수익률 등을 중심으로 봐 주세요.",
         "whatif_help": "What IF는 과거 특정 연도부터 매달 투자했다고 가정했을 때 지금까지 수익률이 얼마나 되었는지 계산해 줍니다.",
         "disclaimer": """
@@ -158,9 +593,15 @@ L = {
 - 🇨🇦 Canada: SHOP.TO, TD.TO
 - 💼 ETF: SPY, QQQ, VFV.TO
         
-**Note:** Use **ticker symbol**, not company name!
+**Tip:** You can also search by company name (Apple, Samsung Electronics) or the start of a symbol.
         """,
+        "ticker_suggest": "Did you mean one of these?",
+        "ticker_pick": "Choose a symbol",
+        "ticker_invalid": "⚠️ Invalid ticker format. Examples: AAPL, 005930.KS, SHOP.TO (Korean stocks need .KS / .KQ)",
         "company_info": "Company Info",
+        "loading_info": "⏳ Loading company info...",
+        "snapshot_used": "📦 Yahoo is not responding; showing saved data from {date}.",
+        "history_unavailable": "📉 Price history is unavailable; the chart, What IF and projection are skipped.",
         "tm_title": "🕰️ What IF",
         "tm_start": "Start Year",
         "sim_title": "📊 Asset Growth Projection",
@@ -198,6 +639,13 @@ L = {
         "dcf_help": "DCF Value is a fair value estimate based on discounted future cash flows per share.",
         "avg_label": "Average Value",
         "growth_used": "Growth Rate Used",
+        "hist_cagr": "Historical CAGR",
+        "bt_title": "📈 Intrinsic Value History Backtest",
+        "bt_price": "Price",
+        "bt_intrinsic": "Intrinsic Value",
+        "bt_band": "Intrinsic ±15% band",
+        "bt_cols": ["Share of Days", "Avg 1Y Fwd Return", "1Y Fwd Hit Rate", "Samples"],
+        "bt_note": "Dates with a stored fundamentals snapshot use that snapshot; earlier dates use the current (or oldest stored) EPS and cash flow discounted back at the growth rate used. Those estimates are built from today's data, so they are shown on the chart for reference only; the table uses snapshot dates only and fills in as snapshots accumulate.",
         "etf_warning": "ℹ️ This is an ETF (a basket of many stocks), so Graham / DCF single-stock fair value models are not directly applicable. Evaluate it by index, fees, and yield.",
         "whatif_help": "What IF shows the return if you had started investing from that year with monthly contributions.",
         "disclaimer": """
@@ -211,10 +659,13 @@ All investment decisions must be made at your own judgment and risk.
 }[st.session_state.user_lang]
 
 # 3. 환율 정보 (캐시 사용) ---------------------------
-def get_exchange_rates():
-    return get_exchange_rates_cached()
+def get_exchange_rates(fx_fetches):
+    return {"USD": 1.0, **{c: f.result() for c, f in fx_fetches.items()}}
 
-rates = get_exchange_rates()
+INFO_TIMEOUT = 10  # 초, 이보다 늦으면 저장된 스냅샷 사용 (스냅샷이 없으면 계속 기다림)
+
+# 환율은 미리 백그라운드로 요청해 두고, 실제로 필요할 때 결과를 기다림
+fx_fetches = start_fx_fetch()
 curr_symbol = {"USD": "$", "CAD": "C$", "KRW": "₩"}[st.session_state.user_currency]
 
 # 4. 기업 정보 추출 ---------------------------
@@ -248,7 +699,76 @@ def get_company_sector(info):
     return "N/A"
 
 # 5. 성장률 계산 ---------------------------
-def get_smart_growth_rate(info, hist_data):
+GROWTH_WINDOWS = (1, 3, 5, 10)  # 롤링 CAGR 구간 (년)
+GROWTH_MIN_YEARS = 1  # 이보다 짧은 히스토리(신규 상장 등)는 회귀 성장률을 쓰지 않음 (기본값으로 대체)
+
+def _annualized_log_slope(t_years, log_p):
+    """로그 주가를 시간(년)에 회귀한 기울기를 연 성장률로 변환 (양 끝점이 아닌 모든 점 사용)"""
+    if len(log_p) < 2:
+        return None
+    t_c = t_years - t_years.mean()
+    denom = (t_c ** 2).sum()
+    if denom <= 0:
+        return None
+    slope = (t_c * (log_p - log_p.mean())).sum() / denom
+    return float(np.expm1(slope))
+
+def _trimmed_mean(values, trim=0.1):
+    """양쪽 trim 비율만큼 잘라낸 평균 (버블/폭락 구간 영향 완화)"""
+    values = np.sort(values[np.isfinite(values)])
+    if len(values) == 0:
+        return None
+    k = int(len(values) * trim)
+    if len(values) > 2 * k:
+        values = values[k : len(values) - k]
+    return float(values.mean())
+
+def empty_growth_profile():
+    """히스토리가 없을 때의 성장률 프로필 (모든 값이 기본값으로 대체됨)"""
+    return {
+        "years": 0.0,
+        "cagr": {},
+        "log_slope": None,
+        "log_slope_5y": None,
+        "trimmed_1y": None,
+    }
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def get_growth_profile(ticker: str):
+    """전체 히스토리 한 번으로 1/3/5/10년 롤링 CAGR, 로그수익률 회귀, 절사평균을 계산 (티커별 캐시)"""
+    hist_full, _ = load_stock_history(ticker, "max")
+    profile = empty_growth_profile()
+    close = hist_full["Close"] if len(hist_full) > 0 else pd.Series(dtype=float)
+    close = close[close > 0].dropna()
+    if len(close) == 0:
+        return profile
+    log_p = np.log(close.to_numpy(dtype=float))
+    t_years = (close.index - close.index[0]).days.to_numpy() / 365.25
+    n = len(log_p)
+    profile["years"] = n / 252
+
+    # 구간별 롤링 CAGR: 로그 차분 한 번으로 모든 시점의 CAGR 계산
+    rolling_1y = None
+    for w in GROWTH_WINDOWS:
+        lag = 252 * w
+        if n <= lag:
+            continue
+        rolling = np.expm1((log_p[lag:] - log_p[:-lag]) / w)
+        profile["cagr"][w] = float(rolling[-1])
+        if w == 1:
+            rolling_1y = rolling
+
+    # 1년이 안 되는 구간의 기울기를 연율화하면 값이 폭주함 (100거래일이면 +260%/년)
+    if t_years[-1] < GROWTH_MIN_YEARS:
+        return profile
+    profile["log_slope"] = _annualized_log_slope(t_years, log_p)
+    recent = 252 * 5
+    profile["log_slope_5y"] = _annualized_log_slope(t_years[-recent:], log_p[-recent:])
+    if rolling_1y is not None:
+        profile["trimmed_1y"] = _trimmed_mean(rolling_1y)
+    return profile
+
+def get_smart_growth_rate(info, growth):
     growth_rates = []
 
     earnings_growth = info.get("earningsGrowth")
@@ -262,16 +782,11 @@ def get_smart_growth_rate(info, hist_data):
     if earnings_quarterly_growth and abs(earnings_quarterly_growth) < 1:
         growth_rates.append(earnings_quarterly_growth * 100)
 
-    if len(hist_data) > 252 * 2:
-        try:
-            years = min(5, len(hist_data) / 252)
-            start_price = hist_data["Close"].iloc[0]
-            end_price = hist_data["Close"].iloc[-1]
-            historical_cagr = ((end_price / start_price) ** (1 / years) - 1) * 100
-            if 0 < historical_cagr < 50:
-                growth_rates.append(historical_cagr)
-        except Exception:
-            pass
+    # 최근 5년 로그 회귀 성장률 + 1년 롤링 CAGR 절사평균 (2년 이상 데이터가 있을 때만)
+    if growth["years"] > 2:
+        for historical in (growth["log_slope_5y"], growth["trimmed_1y"]):
+            if historical is not None and 0 < historical * 100 < 50:
+                growth_rates.append(historical * 100)
 
     if growth_rates:
         growth_rates = [g for g in growth_rates if -20 < g < 40]
@@ -288,12 +803,15 @@ def get_smart_growth_rate(info, hist_data):
     return 8
 
 # 6. Graham's Formula ---------------------------
+def graham_multiplier(growth_rate):
+    """EPS 에 곱할 Graham 배수 (8.5 + 2g), g(%)는 5~20 으로 제한. 배열도 받음"""
+    return 8.5 + 2 * np.clip(growth_rate, 5, 20)
+
 def calculate_graham_value(eps, growth_rate, stock_currency, user_currency):
     try:
         if eps is None or eps <= 0:
             return None
-        g = max(5, min(growth_rate, 20))
-        intrinsic_value = eps * (8.5 + 2 * g)
+        intrinsic_value = eps * float(graham_multiplier(growth_rate))
         converted_value = (
             intrinsic_value / rates.get(stock_currency, 1.0)
         ) * rates[user_currency]
@@ -302,6 +820,22 @@ def calculate_graham_value(eps, growth_rate, stock_currency, user_currency):
         return None
 
 # 7. DCF 계산 ---------------------------
+DCF_DISCOUNT_RATE = 0.12
+DCF_TERMINAL_GROWTH = 0.04
+
+def dcf_multiplier(growth_rate):
+    """주당 현금흐름 1 의 DCF 가치 (10년 성장 + 영구가치), 성장률(%)은 0~20 으로 제한. 배열도 받음"""
+    g = np.clip(np.asarray(growth_rate, dtype=float) / 100, 0, 0.20)
+    years = np.arange(1, 11)
+    fcf_growth = (1 + g)[..., None] ** years
+    pv_sum = (fcf_growth / (1 + DCF_DISCOUNT_RATE) ** years).sum(axis=-1)
+    terminal_value = (
+        fcf_growth[..., -1]
+        * (1 + DCF_TERMINAL_GROWTH)
+        / (DCF_DISCOUNT_RATE - DCF_TERMINAL_GROWTH)
+    )
+    return pv_sum + terminal_value / (1 + DCF_DISCOUNT_RATE) ** 10
+
 def calculate_dcf_value(info, growth_rate, stock_currency, user_currency):
     try:
         operating_cf = info.get("operatingCashflow")
@@ -311,21 +845,7 @@ def calculate_dcf_value(info, growth_rate, stock_currency, user_currency):
             return None
 
         fcf_per_share = operating_cf / shares_outstanding
-        g = max(0, min(growth_rate / 100, 0.20))
-        discount_rate = 0.12
-        terminal_growth = 0.04
-
-        pv_sum = 0
-        for year in range(1, 11):
-            fcf_future = fcf_per_share * ((1 + g) ** year)
-            pv = fcf_future / ((1 + discount_rate) ** year)
-            pv_sum += pv
-
-        terminal_fcf = fcf_per_share * ((1 + g) ** 10) * (1 + terminal_growth)
-        terminal_value = terminal_fcf / (discount_rate - terminal_growth)
-        pv_terminal = terminal_value / ((1 + discount_rate) ** 10)
-
-        intrinsic_value = pv_sum + pv_terminal
+        intrinsic_value = fcf_per_share * float(dcf_multiplier(growth_rate))
         converted_value = (
             intrinsic_value / rates.get(stock_currency, 1.0)
         ) * rates[user_currency]
@@ -333,6 +853,320 @@ def calculate_dcf_value(info, growth_rate, stock_currency, user_currency):
     except Exception:
         return None
 
+def valuation_gap_history(ticker: str, growth_rate):
+    """저장된 스냅샷으로 일자별 Graham/DCF 적정가와 괴리율 계산 (거래 통화 기준)"""
+    snaps = load_fundamentals_history(ticker)
+    eps = snaps["forwardEps"].fillna(snaps["trailingEps"])
+    fcf_per_share = snaps["operatingCashflow"] / snaps["sharesOutstanding"]
+    graham = (eps * graham_multiplier(growth_rate)).where(eps > 0)
+    dcf = (fcf_per_share * dcf_multiplier(growth_rate)).where(fcf_per_share > 0)
+    intrinsic = pd.concat([graham, dcf], axis=1).mean(axis=1)
+    return pd.DataFrame(
+        {
+            "price": snaps["currentPrice"],
+            "graham": graham,
+            "dcf": dcf,
+            "intrinsic": intrinsic,
+            "gap_pct": (snaps["currentPrice"] - intrinsic) / intrinsic * 100,
+        }
+    )
+
+# 7-1. 적정가 히스토리 백테스트 ---------------------------
+VALUATION_BAND = 15  # 저평가/고평가 판정 기준 (±%)
+SIGNAL_HORIZON = 252  # 신호 이후 수익률을 볼 기간 (거래일)
+
+def build_intrinsic_history(close, gaps, eps_now, fcf_now, growth_rate):
+    """전체 주가 히스토리의 모든 날짜에 Graham/DCF 적정가를 한 번에 채움 (거래 통화 기준)
+
+    gaps 는 valuation_gap_history 의 스냅샷별 적정가. 결과 인덱스는 시간대 없는 날짜
+    (plotly 가 tz 포함 날짜를 훨씬 느리게 직렬화함). 각 날짜에는 그 날 이전의 가장 최근
+    스냅샷 적정가를 쓰고, 첫 스냅샷 이전 구간은 가장 오래된 값(스냅샷이 없으면 현재 값)을
+    성장률로 거꾸로 할인한 추정치를 씀 (적정가는 EPS·현금흐름에 비례하므로 그대로 할인).
+    """
+    dates = close.index
+    if dates.tz is not None:
+        dates = dates.tz_localize(None)
+    dates = dates.normalize()
+
+    graham = np.full(len(close), np.nan)
+    dcf = np.full(len(close), np.nan)
+    has_snap = np.zeros(len(close), dtype=bool)
+    base_date = dates[-1]
+    base_graham = eps_now * graham_multiplier(growth_rate) if eps_now and eps_now > 0 else np.nan
+    base_dcf = fcf_now * dcf_multiplier(growth_rate) if fcf_now and fcf_now > 0 else np.nan
+    if len(gaps) > 0:
+        snap_graham = gaps["graham"].to_numpy(dtype=float)
+        snap_dcf = gaps["dcf"].to_numpy(dtype=float)
+        pos = gaps.index.searchsorted(dates, side="right") - 1
+        has_snap = pos >= 0
+        graham[has_snap] = snap_graham[pos[has_snap]]
+        dcf[has_snap] = snap_dcf[pos[has_snap]]
+        base_date, base_graham, base_dcf = gaps.index[0], snap_graham[0], snap_dcf[0]
+
+    # 스냅샷 이전 구간: 기준값 / (1+g)^(경과 년수)
+    years_back = np.clip((base_date - dates).days.to_numpy() / 365.25, 0, None)
+    decay = (1 + growth_rate / 100) ** -years_back
+    estimated = ~has_snap
+    graham[estimated] = base_graham * decay[estimated]
+    dcf[estimated] = base_dcf * decay[estimated]
+
+    price = close.to_numpy(dtype=float)
+    hist = pd.DataFrame(
+        {"price": price, "graham": graham, "dcf": dcf, "estimated": estimated},
+        index=dates,
+    )
+    hist["intrinsic"] = hist[["graham", "dcf"]].mean(axis=1)
+    hist["gap_pct"] = (hist["price"] - hist["intrinsic"]) / hist["intrinsic"] * 100
+    return hist
+
+def intrinsic_signal_stats(hist):
+    """저평가/적정/고평가 신호별 기간 비중과 이후 1년 수익률 통계
+
+    추정 구간(첫 스냅샷 이전)의 적정가는 현재 EPS·성장률을 거꾸로 적용한 값이라 미래 정보가
+    섞여 있으므로, 통계는 실제 스냅샷이 있는 날짜만으로 계산함 (이후 수익률은 전체 주가 사용).
+    """
+    fwd_return = (hist["price"].shift(-SIGNAL_HORIZON) / hist["price"] - 1) * 100
+    gap = hist["gap_pct"].where(~hist["estimated"])
+    valid_days = int(gap.notna().sum())
+    signals = {
+        "undervalued": gap < -VALUATION_BAND,
+        "fair": gap.abs() <= VALUATION_BAND,
+        "overvalued": gap > VALUATION_BAND,
+    }
+    rows = {}
+    for name, mask in signals.items():
+        r = fwd_return[mask].dropna()
+        rows[name] = {
+            "days_pct": mask.sum() / valid_days * 100 if valid_days else np.nan,
+            "avg_fwd_return": r.mean() if len(r) else np.nan,
+            "hit_rate": (r > 0).mean() * 100 if len(r) else np.nan,
+            "samples": len(r),
+        }
+    return pd.DataFrame.from_dict(rows, orient="index")
+
+# 8. 차트 figure (캐시) ---------------------------
+# 위젯 하나만 바뀌어도 스크립트 전체가 다시 실행되므로, 입력(티커·통화·언어·섹션 값)이 같으면
+# 만들어 둔 figure 를 그대로 씀. x/y 는 리스트 대신 numpy 배열로 넘겨 plotly 가 typed array(base64)로
+# 직렬화하게 하고, 날짜는 epoch ms 숫자로 넘겨 (date 축에서 그대로 날짜로 표시됨) 문자열 변환을 피함.
+# 캐시하는 건 figure 생성까지: JSON 직렬화는 st.plotly_chart 가 rerun 마다 다시 함 (미리 직렬화한 spec 을
+# 받는 API 가 없음). typed array 덕분에 직렬화는 몇 ms 라 생성 비용(검증·템플릿)보다 훨씬 작음.
+# 캐시된 figure 는 모든 세션이 같이 쓰므로 꺼낸 뒤 수정하지 말 것 (plotly_chart 는 복사본을 직렬화함).
+FIGURE_CACHE_TTL = 3600
+FIGURE_CACHE_ENTRIES = 256
+
+def _date_ms(index):
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy().astype("datetime64[ms]").astype("float64")
+
+def show_figure(fig, slot=None):
+    (slot or st).plotly_chart(
+        fig,
+        width="stretch",
+        config={"displayModeBar": False},
+    )
+
+@st.cache_resource(ttl=FIGURE_CACHE_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_market_figure(ticker, fx, curr_symbol):
+    hist_5y, _ = load_stock_history(ticker, "5y")
+    fig_market = go.Figure(
+        go.Scatter(
+            x=_date_ms(hist_5y.index),
+            y=hist_5y["Close"].to_numpy(dtype=float) * fx,
+            name="Price",
+            line=dict(color="#58a6ff", width=2),
+            hovertemplate="%{x|%Y-%m-%d}<br>Price: "
+            + curr_symbol
+            + "%{y:,.2f}<extra></extra>",
+        )
+    )
+    fig_market.update_layout(
+        template="plotly_dark",
+        height=280,
+        margin=dict(l=10, r=10, t=10, b=10),
+        hovermode="x unified",
+        xaxis=dict(type="date", fixedrange=True),
+        yaxis=dict(fixedrange=True),
+    )
+    return fig_market
+
+@st.cache_resource(ttl=FIGURE_CACHE_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_value_figure(lang, display_price, avg_intrinsic, status_color, curr_symbol, user_currency):
+    fig_val = go.Figure()
+    fig_val.add_trace(
+        go.Bar(
+            x=[L["cur_p"], L["avg_label"]],
+            y=np.array([display_price, avg_intrinsic]),
+            marker_color=["#58a6ff", status_color],
+            text=[
+                f"{curr_symbol}{display_price:,.2f}",
+                f"{curr_symbol}{avg_intrinsic:,.2f}",
+            ],
+            textposition="auto",
+        )
+    )
+    fig_val.update_layout(
+        template="plotly_dark",
+        height=300,
+        showlegend=False,
+        yaxis_title=user_currency,
+        xaxis=dict(fixedrange=True),
+        yaxis=dict(fixedrange=True),
+    )
+    return fig_val
+
+@st.cache_resource(ttl=FIGURE_CACHE_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_backtest(lang, ticker, eps, fcf_now, growth_rate, fx, curr_symbol):
+    """적정가 히스토리 figure + 신호 통계표"""
+    hist_full, _ = load_stock_history(ticker, "max")
+    bt = build_intrinsic_history(
+        hist_full["Close"],
+        valuation_gap_history(ticker, growth_rate),
+        eps,
+        fcf_now,
+        growth_rate,
+    )
+    x = _date_ms(bt.index)
+    bt_intrinsic = bt["intrinsic"].to_numpy() * fx
+    fig_bt = go.Figure()
+    fig_bt.add_trace(
+        go.Scatter(
+            x=x,
+            y=bt_intrinsic * (1 + VALUATION_BAND / 100),
+            line=dict(width=0),
+            hoverinfo="skip",
+            showlegend=False,
+        )
+    )
+    fig_bt.add_trace(
+        go.Scatter(
+            x=x,
+            y=bt_intrinsic * (1 - VALUATION_BAND / 100),
+            name=L["bt_band"],
+            line=dict(width=0),
+            fill="tonexty",
+            fillcolor="rgba(251,191,36,0.15)",
+            hoverinfo="skip",
+        )
+    )
+    fig_bt.add_trace(
+        go.Scatter(
+            x=x,
+            y=bt_intrinsic,
+            name=L["bt_intrinsic"],
+            line=dict(color="#fbbf24", width=2),
+            hovertemplate="%{x|%Y-%m-%d}<br>"
+            + L["bt_intrinsic"]
+            + ": "
+            + curr_symbol
+            + "%{y:,.2f}<extra></extra>",
+        )
+    )
+    fig_bt.add_trace(
+        go.Scatter(
+            x=x,
+            y=bt["price"].to_numpy() * fx,
+            name=L["bt_price"],
+            line=dict(color="#58a6ff", width=2),
+            hovertemplate="%{x|%Y-%m-%d}<br>"
+            + L["bt_price"]
+            + ": "
+            + curr_symbol
+            + "%{y:,.2f}<extra></extra>",
+        )
+    )
+    fig_bt.update_layout(
+        template="plotly_dark",
+        height=350,
+        hovermode="x unified",
+        yaxis_type="log",
+        xaxis=dict(type="date", fixedrange=True),
+        yaxis=dict(fixedrange=True),
+    )
+
+    stats = intrinsic_signal_stats(bt)
+    stats.index = [L["undervalued"], L["fair"], L["overvalued"]]
+    stats.columns = L["bt_cols"]
+    return fig_bt, stats
+
+def run_sim(r, v, init, monthly, years, user_rate):
+    dt = 1 / 12
+    path_yr = [init]
+    curr = init / user_rate
+    m_u = monthly / user_rate
+    for _ in range(years):
+        for _ in range(12):
+            step = (
+                (r - 0.5 * v ** 2) * dt
+                + v * np.sqrt(dt) * np.random.normal()
+            )
+            curr = (curr + m_u) * np.exp(step)
+        path_yr.append(max(0, curr * user_rate))
+    return np.array(path_yr)
+
+@st.cache_resource(ttl=FIGURE_CACHE_TTL, max_entries=FIGURE_CACHE_ENTRIES, show_spinner=False)
+def build_projection(lang, ticker, calc_cagr, vol_val, init, monthly, inv_y, user_rate, curr_symbol):
+    """자산성장 시뮬레이션 figure + 최종값 (입력이 같으면 같은 경로를 보여줌, ticker 는 캐시 키용)"""
+    years_arr = np.arange(inv_y + 1, dtype=np.int32)
+    p_real = run_sim(calc_cagr, vol_val * 0.7, init, monthly, inv_y, user_rate)
+    p_bull = run_sim(calc_cagr * 1.3, vol_val * 0.5, init, monthly, inv_y, user_rate)
+    p_bear = run_sim(calc_cagr * 0.6, vol_val * 1.2, init, monthly, inv_y, user_rate)
+    principal_path = init + monthly * 12 * years_arr.astype(float)
+
+    fig_f = go.Figure()
+    fig_f.add_trace(
+        go.Scatter(
+            x=years_arr,
+            y=p_real,
+            name=f"{L['real']} ({curr_symbol}{p_real[-1]:,.0f})",
+            line=dict(color="#10b981", width=4),
+            hovertemplate="Year %{x}<br>Value: "
+            + curr_symbol
+            + "%{y:,.0f}<extra></extra>",
+        )
+    )
+    fig_f.add_trace(
+        go.Scatter(
+            x=years_arr,
+            y=p_bull,
+            name=f"{L['bull']} ({curr_symbol}{p_bull[-1]:,.0f})",
+            line=dict(dash="dash", color="#3b82f6"),
+            hovertemplate="Year %{x}<br>Value: "
+            + curr_symbol
+            + "%{y:,.0f}<extra></extra>",
+        )
+    )
+    fig_f.add_trace(
+        go.Scatter(
+            x=years_arr,
+            y=p_bear,
+            name=f"{L['bear']} ({curr_symbol}{p_bear[-1]:,.0f})",
+            line=dict(dash="dot", color="#ef4444"),
+            hovertemplate="Year %{x}<br>Value: "
+            + curr_symbol
+            + "%{y:,.0f}<extra></extra>",
+        )
+    )
+    fig_f.add_trace(
+        go.Scatter(
+            x=years_arr,
+            y=principal_path,
+            name=f"{L['principal']} ({curr_symbol}{principal_path[-1]:,.0f})",
+            line=dict(color="#ffffff", dash="dot"),
+            hovertemplate="Year %{x}<br>Principal: "
+            + curr_symbol
+            + "%{y:,.0f}<extra></extra>",
+        )
+    )
+    fig_f.update_layout(
+        template="plotly_dark",
+        height=400,
+        hovermode="x unified",
+        xaxis=dict(fixedrange=True),
+        yaxis=dict(fixedrange=True),
+    )
+    return fig_f, float(p_real[-1]), float(p_bull[-1]), float(principal_path[-1])
+
 # 사이드바 ---------------------------
 st.sidebar.title("Wealthy Dongjoo")
 if st.sidebar.button(L["dash"]):
@@ -355,59 +1189,108 @@ if st.session_state.menu == "Settings":
     )
 
 else:
-    ticker = st.text_input(L["input_ticker"], "", help=L["ticker_help"]).upper()
+    query = st.text_input(L["input_ticker"], "", help=L["ticker_help"])
+
+    # 로컬 인덱스로 먼저 확인: 이름 → 티커 변환, 애매하면 후보 선택, 잘못된 형식은 요청 없이 거절
+    ticker, suggestions = resolve_ticker(query)
+    if suggestions:
+        ticker = st.selectbox(
+            L["ticker_suggest"],
+            suggestions,
+            index=None,
+            placeholder=L["ticker_pick"],
+            format_func=lambda s: symbol_label(s, st.session_state.user_lang),
+        )
+    elif query.strip() and ticker is None:
+        st.error(L["ticker_invalid"])
 
     if ticker:
         try:
-            # 캐시된 yfinance 호출 사용
-            info, hist_full, hist_5y = load_stock_all(ticker)
+            # info / 히스토리 요청을 동시에 시작 (환율은 이미 요청 중)
+            fetches = start_stock_fetch(ticker)
+
+            # 자리 표시자: 히스토리가 먼저 오면 헤더/차트부터 그리고, .info 가 오면 나머지를 채움
+            header_slot = st.empty()
+            caption_slot = st.empty()
+            warning_slot = st.empty()
+            chart_slot = st.empty()
+            header_slot.markdown(f"### {ticker}")
+            caption_slot.caption(L["loading_info"])
+
+            rates = get_exchange_rates(fx_fetches)
+            # 야후 장애로 히스토리가 실패해도 .info / 스냅샷으로 나머지를 그릴 수 있게 오류만 기억해 둠
+            history_error = None
+            try:
+                hist_5y, hist_currency = fetches["hist_5y"].result()
+            except Exception as e:
+                hist_5y, hist_currency, history_error = pd.DataFrame(), None, e
+            stock_currency = hist_currency or "USD"
 
-            stock_currency = info.get("currency", "USD")
+            # 5년 차트
+            if len(hist_5y) > 0:
+                show_figure(
+                    build_market_figure(
+                        ticker,
+                        rates[st.session_state.user_currency]
+                        / rates.get(stock_currency, 1.0),
+                        curr_symbol,
+                    ),
+                    chart_slot,
+                )
+
+            # .info 가 늦거나 실패하면 저장된 최신 스냅샷으로 대신함
+            snapshot_date = None
+            try:
+                info = fetches["info"].result(timeout=INFO_TIMEOUT)
+            except Exception as e:
+                info = load_latest_fundamentals(ticker)
+                if info is not None:
+                    snapshot_date = info["snap_date"]
+                elif isinstance(e, FutureTimeoutError):
+                    info = fetches["info"].result()  # 스냅샷이 없는 새 티커는 느려도 끝까지 기다림
+                else:
+                    raise
+            try:
+                hist_full, _ = fetches["hist_full"].result()
+            except Exception as e:
+                hist_full = pd.DataFrame()
+                history_error = history_error or e
+            growth = get_growth_profile(ticker) if history_error is None else empty_growth_profile()
+
+            info_currency = info.get("currency") or stock_currency
+            if info_currency != stock_currency:
+                # 히스토리 메타데이터와 통화가 다르면 .info 기준으로 차트를 다시 그림
+                stock_currency = info_currency
+                if len(hist_5y) > 0:
+                    show_figure(
+                        build_market_figure(
+                            ticker,
+                            rates[st.session_state.user_currency]
+                            / rates.get(stock_currency, 1.0),
+                            curr_symbol,
+                        ),
+                        chart_slot,
+                    )
             is_etf = info.get("quoteType") == "ETF"
 
             company_name = info.get("longName") or info.get("shortName") or ticker
             sector_info = get_company_sector(info)
 
-            st.markdown(f"### {company_name}")
-            st.caption(f"**{L['company_info']}:** {sector_info}")
+            header_slot.markdown(f"### {company_name}")
+            caption_text = f"**{L['company_info']}:** {sector_info}"
+            if snapshot_date:
+                caption_text += "  \n" + L["snapshot_used"].format(date=snapshot_date)
+            caption_slot.caption(caption_text)
+            if history_error is not None:
+                chart_slot.info(L["history_unavailable"])
 
             # 레버리지 감지 시 빨간 경고
             if detect_leveraged_from_info(info):
-                st.markdown(
+                warning_slot.markdown(
                     f"<p style='color:#ff4b4b; font-size:0.9rem; white-space:pre-line;'>{leveraged_warning_text(st.session_state.user_lang)}</p>",
                     unsafe_allow_html=True,
                 )
 
-            # 5년 차트
-            if len(hist_5y) > 0:
-                adj_5y = (
-                    hist_5y["Close"] / rates.get(stock_currency, 1.0)
-                ) * rates[st.session_state.user_currency]
-                fig_market = go.Figure(
-                    go.Scatter(
-                        x=hist_5y.index,
-                        y=adj_5y,
-                        name="Price",
-                        line=dict(color="#58a6ff", width=2),
-                        hovertemplate="%{x|%Y-%m-%d}<br>Price: "
-                        + curr_symbol
-                        + "%{y:,.2f}<extra></extra>",
-                    )
-                )
-                fig_market.update_layout(
-                    template="plotly_dark",
-                    height=280,
-                    margin=dict(l=10, r=10, t=10, b=10),
-                    hovermode="x unified",
-                    xaxis=dict(fixedrange=True),
-                    yaxis=dict(fixedrange=True),
-                )
-                st.plotly_chart(
-                    fig_market,
-                    use_container_width=True,
-                    config={"displayModeBar": False},
-                )
-
             raw_p = (
                 info.get("currentPrice")
                 or info.get("regularMarketPrice")
@@ -508,7 +1391,7 @@ else:
             if is_etf:
                 st.info(L["etf_warning"])
             else:
-                smart_growth = get_smart_growth_rate(info, hist_5y)
+                smart_growth = get_smart_growth_rate(info, growth)
                 eps = info.get("forwardEps") or info.get("trailingEps")
                 per_check = (
                     info.get("forwardPE") or info.get("trailingPE") or 0
@@ -556,10 +1439,10 @@ else:
                             * 100
                         )
 
-                        if gap_pct < -15:
+                        if gap_pct < -VALUATION_BAND:
                             status = L["undervalued"]
                             status_color = "#10b981"
-                        elif gap_pct > 15:
+                        elif gap_pct > VALUATION_BAND:
                             status = L["overvalued"]
                             status_color = "#ef4444"
                         else:
@@ -569,6 +1452,14 @@ else:
                         st.info(
                             f"📊 {L['growth_used']}: {smart_growth:.1f}%"
                         )
+                        if growth["cagr"]:
+                            st.caption(
+                                f"{L['hist_cagr']}: "
+                                + " | ".join(
+                                    f"{w}Y {c*100:+.1f}%"
+                                    for w, c in growth["cagr"].items()
+                                )
+                            )
 
                         vc1, vc2, vc3 = st.columns(3)
 
@@ -606,227 +1497,163 @@ else:
                         )
                         st.metric(L["gap_label"], f"{gap_pct:+.1f}%")
 
-                        fig_val = go.Figure()
-                        fig_val.add_trace(
-                            go.Bar(
-                                x=[L["cur_p"], L["avg_label"]],
-                                y=[display_price, avg_intrinsic],
-                                marker_color=["#58a6ff", status_color],
-                                text=[
-                                    f"{curr_symbol}{display_price:,.2f}",
-                                    f"{curr_symbol}{avg_intrinsic:,.2f}",
-                                ],
-                                textposition="auto",
+                        show_figure(
+                            build_value_figure(
+                                st.session_state.user_lang,
+                                display_price,
+                                avg_intrinsic,
+                                status_color,
+                                curr_symbol,
+                                st.session_state.user_currency,
                             )
                         )
-                        fig_val.update_layout(
-                            template="plotly_dark",
-                            height=300,
-                            showlegend=False,
-                            yaxis_title=st.session_state.user_currency,
-                            xaxis=dict(fixedrange=True),
-                            yaxis=dict(fixedrange=True),
+
+                        # 적정가 히스토리 백테스트 (저장된 스냅샷 + 과거 구간 추정치)
+                        if len(hist_full) > 0:
+                            with st.expander(L["bt_title"]):
+                                ocf = info.get("operatingCashflow")
+                                so = info.get("sharesOutstanding")
+                                fig_bt, stats = build_backtest(
+                                    st.session_state.user_lang,
+                                    ticker,
+                                    eps,
+                                    ocf / so if ocf and so else None,
+                                    smart_growth,
+                                    rates[st.session_state.user_currency]
+                                    / rates.get(stock_currency, 1.0),
+                                    curr_symbol,
+                                )
+                                show_figure(fig_bt)
+                                st.dataframe(
+                                    stats.style.format(
+                                        {
+                                            L["bt_cols"][0]: "{:.1f}%",
+                                            L["bt_cols"][1]: "{:+.1f}%",
+                                            L["bt_cols"][2]: "{:.1f}%",
+                                        },
+                                        na_rep="N/A",
+                                    ),
+                                    width="stretch",
+                                )
+                                st.caption(L["bt_note"])
+
+            # What IF / 자산성장 예측은 주가 히스토리가 있어야 계산 가능
+            if history_error is None:
+                # What IF + 설명 버튼
+                st.divider()
+                col_tm_title, col_tm_help = st.columns([4, 1])
+                with col_tm_title:
+                    st.subheader(L["tm_title"])
+                with col_tm_help:
+                    if st.button("ⓘ", key="whatif_help_btn"):
+                        st.caption(L["whatif_help"])
+
+                if len(hist_full) > 0:
+                    list_yr = hist_full.index[0].year
+                    available_yrs = list(range(list_yr, datetime.now().year))
+
+                    if available_yrs:
+                        default_yr = (
+                            max(list_yr, 2000)
+                            if max(list_yr, 2000) in available_yrs
+                            else available_yrs[0]
                         )
-                        st.plotly_chart(
-                            fig_val,
-                            use_container_width=True,
-                            config={"displayModeBar": False},
+                        selected_yr = st.selectbox(
+                            L["tm_start"],
+                            available_yrs[::-1],
+                            index=available_yrs[::-1].index(default_yr),
                         )
 
-            # What IF + 설명 버튼
-            st.divider()
-            col_tm_title, col_tm_help = st.columns([4, 1])
-            with col_tm_title:
-                st.subheader(L["tm_title"])
-            with col_tm_help:
-                if st.button("ⓘ", key="whatif_help_btn"):
-                    st.caption(L["whatif_help"])
-
-            if len(hist_full) > 0:
-                list_yr = hist_full.index[0].year
-                available_yrs = list(range(list_yr, datetime.now().year))
-
-                if available_yrs:
-                    default_yr = (
-                        max(list_yr, 2000)
-                        if max(list_yr, 2000) in available_yrs
-                        else available_yrs[0]
-                    )
-                    selected_yr = st.selectbox(
-                        L["tm_start"],
-                        available_yrs[::-1],
-                        index=available_yrs[::-1].index(default_yr),
-                    )
-
-                    wi_init = st.number_input(
-                        L["init_cash"], value=1000, key="wi_in"
-                    )
-                    wi_month = st.number_input(
-                        L["monthly_cash"], value=200, key="wi_mon"
-                    )
-
-                    p_data = hist_full.loc[f"{selected_yr}-01-01":]["Close"]
-
-                    if len(p_data) > 0:
-                        p_data_m = p_data.resample("ME").last()
-                        init_u = wi_init / rates[st.session_state.user_currency]
-                        month_u = wi_month / rates[
-                            st.session_state.user_currency
-                        ]
-                        shares = init_u / (
-                            p_data.iloc[0]
-                            / rates.get(stock_currency, 1.0)
+                        wi_init = st.number_input(
+                            L["init_cash"], value=1000, key="wi_in"
+                        )
+                        wi_month = st.number_input(
+                            L["monthly_cash"], value=200, key="wi_mon"
                         )
 
-                        for p in p_data_m:
-                            shares += month_u / (
-                                p / rates.get(stock_currency, 1.0)
-                            )
+                        p_data = hist_full.loc[f"{selected_yr}-01-01":]["Close"]
 
-                        final_v_past = (
-                            shares
-                            * (
-                                p_data.iloc[-1]
+                        if len(p_data) > 0:
+                            p_data_m = p_data.resample("ME").last()
+                            init_u = wi_init / rates[st.session_state.user_currency]
+                            month_u = wi_month / rates[
+                                st.session_state.user_currency
+                            ]
+                            shares = init_u / (
+                                p_data.iloc[0]
                                 / rates.get(stock_currency, 1.0)
                             )
-                            * rates[st.session_state.user_currency]
-                        )
-                        total_i_past = wi_init + wi_month * len(p_data_m)
 
-                        wc1, wc2 = st.columns(2)
-                        wc1.metric(
-                            f"Past {L['final_asset']}",
-                            f"{curr_symbol}{final_v_past:,.0f}",
-                        )
-                        wc2.metric(
-                            f"Past {L['profit']}",
-                            f"{curr_symbol}{final_v_past - total_i_past:,.0f}",
-                            f"{((final_v_past-total_i_past)/total_i_past)*100:.1f}%",
-                        )
+                            for p in p_data_m:
+                                shares += month_u / (
+                                    p / rates.get(stock_currency, 1.0)
+                                )
 
-            # 자산성장 예측표
-            st.divider()
-            st.subheader(L["sim_title"])
+                            final_v_past = (
+                                shares
+                                * (
+                                    p_data.iloc[-1]
+                                    / rates.get(stock_currency, 1.0)
+                                )
+                                * rates[st.session_state.user_currency]
+                            )
+                            total_i_past = wi_init + wi_month * len(p_data_m)
+
+                            wc1, wc2 = st.columns(2)
+                            wc1.metric(
+                                f"Past {L['final_asset']}",
+                                f"{curr_symbol}{final_v_past:,.0f}",
+                            )
+                            wc2.metric(
+                                f"Past {L['profit']}",
+                                f"{curr_symbol}{final_v_past - total_i_past:,.0f}",
+                                f"{((final_v_past-total_i_past)/total_i_past)*100:.1f}%",
+                            )
 
-            inv_y = st.slider(L["inv_years"], 1, 30, 10)
+                # 자산성장 예측표
+                st.divider()
+                st.subheader(L["sim_title"])
 
-            wi_init_sim = st.number_input(
-                L["init_cash"], value=1000, key="sim_in"
-            )
-            wi_month_sim = st.number_input(
-                L["monthly_cash"], value=200, key="sim_mon"
-            )
+                inv_y = st.slider(L["inv_years"], 1, 30, 10)
 
-            if len(hist_full) > 1:
-                days = max(
-                    1, (hist_full.index[-1] - hist_full.index[0]).days / 365.25
+                wi_init_sim = st.number_input(
+                    L["init_cash"], value=1000, key="sim_in"
+                )
+                wi_month_sim = st.number_input(
+                    L["monthly_cash"], value=200, key="sim_mon"
                 )
-                calc_cagr = (
-                    hist_full["Close"].iloc[-1]
-                    / hist_full["Close"].iloc[0]
-                ) ** (1 / days) - 1
-            else:
-                calc_cagr = 0.08
-
-            years_arr = np.arange(inv_y + 1)
-
-            def run_sim(r, v, init, monthly):
-                dt = 1 / 12
-                path_yr = [init]
-                curr = init / rates[st.session_state.user_currency]
-                m_u = monthly / rates[st.session_state.user_currency]
-                for _ in range(inv_y):
-                    for _ in range(12):
-                        growth = (
-                            (r - 0.5 * v ** 2) * dt
-                            + v * np.sqrt(dt) * np.random.normal()
-                        )
-                        curr = (curr + m_u) * np.exp(growth)
-                    path_yr.append(
-                        max(0, curr * rates[st.session_state.user_currency])
-                    )
-                return path_yr
 
-            p_real = run_sim(calc_cagr, vol_val * 0.7, wi_init_sim, wi_month_sim)
-            p_bull = run_sim(
-                calc_cagr * 1.3, vol_val * 0.5, wi_init_sim, wi_month_sim
-            )
-            p_bear = run_sim(
-                calc_cagr * 0.6, vol_val * 1.2, wi_init_sim, wi_month_sim
-            )
-            principal_path = [
-                wi_init_sim + wi_month_sim * 12 * y for y in years_arr
-            ]
-
-            fig_f = go.Figure()
-            fig_f.add_trace(
-                go.Scatter(
-                    x=years_arr,
-                    y=p_real,
-                    name=f"{L['real']} ({curr_symbol}{p_real[-1]:,.0f})",
-                    line=dict(color="#10b981", width=4),
-                    hovertemplate="Year %{x}<br>Value: "
-                    + curr_symbol
-                    + "%{y:,.0f}<extra></extra>",
+                # 전체 히스토리 로그 회귀 성장률 (성장률 프로필 재사용)
+                calc_cagr = growth["log_slope"]
+                if calc_cagr is None:
+                    calc_cagr = 0.08
+
+                fig_f, real_final, bull_final, principal_final = build_projection(
+                    st.session_state.user_lang,
+                    ticker,
+                    calc_cagr,
+                    vol_val,
+                    wi_init_sim,
+                    wi_month_sim,
+                    inv_y,
+                    rates[st.session_state.user_currency],
+                    curr_symbol,
                 )
-            )
-            fig_f.add_trace(
-                go.Scatter(
-                    x=years_arr,
-                    y=p_bull,
-                    name=f"{L['bull']} ({curr_symbol}{p_bull[-1]:,.0f})",
-                    line=dict(dash="dash", color="#3b82f6"),
-                    hovertemplate="Year %{x}<br>Value: "
-                    + curr_symbol
-                    + "%{y:,.0f}<extra></extra>",
+                show_figure(fig_f)
+
+                rc1, rc2, rc3 = st.columns(3)
+                rc1.metric(
+                    f"{L['real']} {L['final_asset']}",
+                    f"{curr_symbol}{real_final:,.0f}",
                 )
-            )
-            fig_f.add_trace(
-                go.Scatter(
-                    x=years_arr,
-                    y=p_bear,
-                    name=f"{L['bear']} ({curr_symbol}{p_bear[-1]:,.0f})",
-                    line=dict(dash="dot", color="#ef4444"),
-                    hovertemplate="Year %{x}<br>Value: "
-                    + curr_symbol
-                    + "%{y:,.0f}<extra></extra>",
+                rc2.metric(
+                    f"{L['bull']} {L['final_asset']}",
+                    f"{curr_symbol}{bull_final:,.0f}",
                 )
-            )
-            fig_f.add_trace(
-                go.Scatter(
-                    x=years_arr,
-                    y=principal_path,
-                    name=f"{L['principal']} ({curr_symbol}{principal_path[-1]:,.0f})",
-                    line=dict(color="#ffffff", dash="dot"),
-                    hovertemplate="Year %{x}<br>Principal: "
-                    + curr_symbol
-                    + "%{y:,.0f}<extra></extra>",
+                rc3.metric(
+                    L["principal"],
+                    f"{curr_symbol}{principal_final:,.0f}",
                 )
-            )
-            fig_f.update_layout(
-                template="plotly_dark",
-                height=400,
-                hovermode="x unified",
-                xaxis=dict(fixedrange=True),
-                yaxis=dict(fixedrange=True),
-            )
-            st.plotly_chart(
-                fig_f, use_container_width=True, config={"displayModeBar": False}
-            )
-
-            rc1, rc2, rc3 = st.columns(3)
-            rc1.metric(
-                f"{L['real']} {L['final_asset']}",
-                f"{curr_symbol}{p_real[-1]:,.0f}",
-            )
-            rc2.metric(
-                f"{L['bull']} {L['final_asset']}",
-                f"{curr_symbol}{p_bull[-1]:,.0f}",
-            )
-            rc3.metric(
-                L["principal"],
-                f"{curr_symbol}{principal_path[-1]:,.0f}",
-            )
 
             # 맨 아래 경고문 (노란색 글씨)
             st.divider()
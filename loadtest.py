@@ -0,0 +1,284 @@
+"""Wealthy Dongjoo 부하 테스트
+
+Streamlit AppTest 로 대시보드 흐름(티커 입력, 슬라이더/입력값 변경, 언어 전환)을
+여러 가상 사용자가 동시에 실행하게 하고, 야후 대신 오프라인 가짜 데이터를 사용함.
+rerun 지연시간 p50/p95/p99, 처리량, 메모리 증가량을 출력.
+
+    python loadtest.py --users 20 --actions 15 --latency 0.2
+    python loadtest.py --users 50 --shared-cache   # 공용 캐시(SQLite) 경로로 실행
+"""
+import argparse
+import logging
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import yfinance
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "dongjoo.py")
+FIXTURE_TICKERS = (
+    "AAPL",
+    "MSFT",
+    "NVDA",
+    "TSLA",
+    "SPY",
+    "QQQ",
+    "005930.KS",
+    "035720.KS",
+    "SHOP.TO",
+    "TD.TO",
+)
+FX_FIXTURE = {"USDCAD=X": 1.37, "USDKRW=X": 1390.0}
+ETF_FIXTURES = {"SPY", "QQQ"}
+HISTORY_YEARS = {"max": 25, "5y": 5}
+
+# 오프라인 가짜 데이터 ---------------------------
+class FixtureTicker:
+    """yfinance.Ticker 대신 쓰는 가짜 티커 (티커별로 항상 같은 데이터, 네트워크 지연은 흉내만 냄)"""
+
+    latency = 0.0
+
+    def __init__(self, ticker: str):
+        self.ticker = ticker.upper()
+        self.seed = zlib.crc32(self.ticker.encode())
+        self.currency = (
+            "KRW" if self.ticker.endswith((".KS", ".KQ"))
+            else "CAD" if self.ticker.endswith(".TO")
+            else "USD"
+        )
+        self.history_metadata = {}
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _closes(self, days: int):
+        rng = np.random.default_rng(self.seed)
+        total = 252 * HISTORY_YEARS["max"]
+        base = 70000.0 if self.currency == "KRW" else 20.0
+        drift = rng.uniform(0.0001, 0.0008)
+        closes = base * np.exp(np.cumsum(rng.normal(drift, 0.018, total)))
+        return closes[-days:]
+
+    @property
+    def info(self):
+        self._wait()
+        if self.ticker in FX_FIXTURE:
+            return {"regularMarketPrice": FX_FIXTURE[self.ticker]}
+        rng = np.random.default_rng(self.seed + 1)
+        price = float(self._closes(1)[-1])
+        info = {
+            "currency": self.currency,
+            "quoteType": "ETF" if self.ticker in ETF_FIXTURES else "EQUITY",
+            "longName": f"{self.ticker} Fixture Corp",
+            "sector": "Technology",
+            "industry": "Software",
+            "currentPrice": price,
+            "fiftyTwoWeekHigh": price * 1.2,
+            "fiftyTwoWeekLow": price * 0.7,
+            "forwardPE": float(rng.uniform(10, 40)),
+            "returnOnEquity": float(rng.uniform(0.05, 0.35)),
+            "priceToBook": float(rng.uniform(1, 10)),
+            "earningsGrowth": float(rng.uniform(-0.1, 0.3)),
+            "revenueGrowth": float(rng.uniform(0, 0.2)),
+            "sharesOutstanding": 1e9,
+        }
+        info["forwardEps"] = price / info["forwardPE"]
+        info["operatingCashflow"] = info["forwardEps"] * 1.3 * 1e9
+        return info
+
+    def history(self, period: str = "max"):
+        self._wait()
+        days = 252 * HISTORY_YEARS.get(period, HISTORY_YEARS["max"])
+        closes = self._closes(days)
+        index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days, tz="America/New_York")
+        self.history_metadata = {"currency": self.currency}
+        return pd.DataFrame(
+            {"Open": closes, "High": closes, "Low": closes, "Close": closes, "Volume": 0},
+            index=index,
+        )
+
+# 가상 사용자 시나리오 ---------------------------
+def _rss_mb() -> float:
+    """현재 RSS (MB). /proc 이 없으면 최대 RSS 로 대신함"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def _patch_apptest_for_threads():
+    """AppTest 를 한 프로세스 안에서 스레드로 동시에 돌리기 위한 보정 (실제 서버와 같은 공유 구조로 맞춤)
+
+    - AppTest 는 실행마다 전역 Runtime 을 새로 두고 끝나면 None 으로 지워서, 동시에 도는 다른 세션의
+      런타임까지 없애 버림 → 지워진 뒤에도 마지막 런타임을 계속 쓰게 함
+    - 실행마다 스크립트를 새로 컴파일함 (동시 컴파일은 파이썬 3.11 에서 깨지기도 함)
+      → 실제 서버처럼 바이트코드를 프로세스에서 한 번만 컴파일해 공유
+    """
+    last = {}
+
+    def instance(cls):
+        if cls._instance is not None:
+            last["runtime"] = cls._instance
+            return cls._instance
+        if "runtime" in last:
+            return last["runtime"]
+        raise RuntimeError("Runtime hasn't been created!")
+
+    def exists(cls):
+        return cls._instance is not None or "runtime" in last
+
+    Runtime.instance = classmethod(instance)
+    Runtime.exists = classmethod(exists)
+
+    compile_lock = threading.Lock()
+    bytecode = {}
+    get_bytecode = ScriptCache.get_bytecode
+
+    def shared_get_bytecode(self, script_path):
+        with compile_lock:
+            if script_path not in bytecode:
+                bytecode[script_path] = get_bytecode(self, script_path)
+            return bytecode[script_path]
+
+    ScriptCache.get_bytecode = shared_get_bytecode
+
+def _widget(elements, key):
+    matches = [w for w in elements if w.key == key]
+    return matches[0] if matches else None
+
+def run_session(user_id: int, n_actions: int, timeout: float, results: list, lock):
+    """한 사용자: 앱 열기 → 티커 입력 → 무작위 위젯 조작 n_actions 번"""
+    rng = random.Random(user_id)
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+
+    def timed(action, fn, rendered=None):
+        """rerun 한 번을 측정. 앱은 데이터 오류를 st.error 로 보여주므로 예외뿐 아니라 st.error 와
+        기대한 화면이 안 그려진 경우(rendered)도 실패로 셈 (빠른 오류 화면이 지연시간에 섞이지 않게)"""
+        start = time.perf_counter()
+        error = None
+        try:
+            fn()
+            if at.exception:
+                error = at.exception[0].value
+            elif at.error:
+                error = at.error[0].value
+            elif rendered is not None and not rendered():
+                error = "dashboard not rendered"
+        except Exception as e:
+            error = str(e)
+        elapsed = time.perf_counter() - start
+        with lock:
+            results.append((action, elapsed, error))
+
+    # 설정 화면 왕복은 rerun 4번 (각각 따로 측정)
+    settings_steps = [
+        ("settings", lambda: at.sidebar.button[1].click().run()),
+        ("language", lambda: at.radio[0].set_value(rng.choice(["KO", "EN"])).run()),
+        ("currency", lambda: at.selectbox[0].set_value(rng.choice(["USD", "CAD", "KRW"])).run()),
+        ("dashboard", lambda: at.sidebar.button[0].click().run()),
+    ]
+
+    def dashboard_rendered():
+        return len(at.slider) > 0  # 자산성장 예측 슬라이더 = 페이지 끝까지 그려짐
+
+    timed("open", at.run)
+    timed("ticker", lambda: at.text_input[0].input(rng.choice(FIXTURE_TICKERS)).run(), dashboard_rendered)
+
+    actions = {
+        "ticker": lambda: at.text_input[0].input(rng.choice(FIXTURE_TICKERS)).run(),
+        "sim_years": lambda: at.slider[0].set_value(rng.randint(1, 30)).run(),
+        "sim_monthly": lambda: _widget(at.number_input, "sim_mon").set_value(rng.choice([100, 200, 500, 1000])).run(),
+        "whatif_init": lambda: _widget(at.number_input, "wi_in").set_value(rng.choice([500, 1000, 5000])).run(),
+    }
+    for _ in range(n_actions):
+        name = rng.choice(list(actions) + ["settings"])
+        if name == "settings":
+            for step, fn in settings_steps:
+                timed(step, fn)
+            continue
+        if name != "ticker" and not at.slider:
+            name = "ticker"  # 대시보드가 아직 안 그려졌으면 티커부터
+        timed(name, actions[name], dashboard_rendered)
+
+def percentile_table(results):
+    """성공한 rerun 만으로 동작별 p50/p95/p99 표를 만듦"""
+    lat = np.array([r[1] for r in results]) * 1000
+    by_action = {}
+    for action, elapsed, _ in results:
+        by_action.setdefault(action, []).append(elapsed * 1000)
+    lines = [f"{'action':<12}{'n':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+    for action, values in sorted(by_action.items()) + [("ALL", list(lat))]:
+        p50, p95, p99 = np.percentile(values, [50, 95, 99])
+        lines.append(f"{action:<12}{len(values):>6}{p50:>10.0f}{p95:>10.0f}{p99:>10.0f}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Wealthy Dongjoo 대시보드 동시 세션 부하 테스트")
+    parser.add_argument("--users", type=int, default=10, help="동시 가상 사용자 수")
+    parser.add_argument("--actions", type=int, default=10, help="사용자당 위젯 조작 횟수")
+    parser.add_argument("--latency", type=float, default=0.0, help="가짜 야후 요청 지연 (초)")
+    parser.add_argument("--timeout", type=float, default=120.0, help="rerun 한 번의 제한 시간 (초)")
+    parser.add_argument("--shared-cache", action="store_true", help="공용 캐시(SQLite) 경로로 실행")
+    parser.add_argument("--tracemalloc", action="store_true", help="파이썬 힙 증가량도 측정 (느려짐)")
+    args = parser.parse_args(argv)
+
+    # 앱 설정은 import 전에: 스냅샷/공용 캐시는 임시 폴더로
+    workdir = tempfile.mkdtemp(prefix="dongjoo-loadtest-")
+    os.environ["DONGJOO_SNAPSHOT_DB"] = os.path.join(workdir, "fundamentals.sqlite")
+    if args.shared_cache:
+        os.environ["DONGJOO_SHARED_CACHE"] = "sqlite://" + os.path.join(workdir, "cache.sqlite")
+    else:
+        os.environ.pop("DONGJOO_SHARED_CACHE", None)
+
+    # 폐기 경고, 조회 스레드의 ScriptRunContext 경고가 rerun 마다 반복돼 결과가 묻히지 않게
+    # (streamlit 이 실행마다 로그 레벨을 되돌리므로 레벨 대신 disabled)
+    for name in ("streamlit.deprecation_util", "streamlit.runtime.scriptrunner_utils.script_run_context"):
+        logging.getLogger(name).disabled = True
+    FixtureTicker.latency = args.latency
+    yfinance.Ticker = FixtureTicker
+    _patch_apptest_for_threads()
+
+    if args.tracemalloc:
+        tracemalloc.start()
+    rss_start = _rss_mb()
+    results, lock = [], threading.Lock()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [
+            pool.submit(run_session, user_id, args.actions, args.timeout, results, lock)
+            for user_id in range(args.users)
+        ]
+        for f in futures:
+            f.result()
+    wall = time.perf_counter() - start
+    rss_end = _rss_mb()
+
+    errors = [r for r in results if r[2]]
+    ok = [r for r in results if not r[2]]
+    print(f"users={args.users} actions/user={args.actions} latency={args.latency}s shared_cache={args.shared_cache}")
+    if ok:
+        print(percentile_table(ok))  # 실패한 rerun(빠른 오류 화면)은 지연시간 통계에서 뺌
+    print(f"reruns: {len(results)}  errors: {len(errors)}  wall: {wall:.1f}s  throughput: {len(results) / wall:.1f} reruns/s")
+    print(f"RSS: {rss_start:.0f} MB -> {rss_end:.0f} MB (+{rss_end - rss_start:.0f} MB)")
+    if args.tracemalloc:
+        current, peak = tracemalloc.get_traced_memory()
+        print(f"python heap: {current / 2**20:.0f} MB (peak {peak / 2**20:.0f} MB)")
+    for action, _, error in errors[:5]:
+        print(f"  {action}: {error}")
+    return 1 if errors else 0
+
+if __name__ == "__main__":
+    sys.exit(main())